@@ -2,6 +2,7 @@ from shared_functions import *
 from typing import List, Dict, Any
 from ibm_watsonx_ai.foundation_models.utils.enums import ModelTypes
 from ibm_watsonx_ai.foundation_models import ModelInference
+from functools import lru_cache
 import json
 
 # Global variables
@@ -18,15 +19,17 @@ project_id = "skills-network"  # <--- NOTE: specify "skills-network" as your pro
 space_id = None
 verify = False
 
-# Initialize the LLM model
-model = ModelInference(
-    model_id=model_id,
-    credentials=my_credentials,
-    params=gen_parms,
-    project_id=project_id,
-    space_id=space_id,
-    verify=verify,
-)
+@lru_cache(maxsize=1)
+def get_model() -> ModelInference:
+    """Create the LLM model on first use and reuse it afterwards"""
+    return ModelInference(
+        model_id=model_id,
+        credentials=my_credentials,
+        params=gen_parms,
+        project_id=project_id,
+        space_id=space_id,
+        verify=verify,
+    )
 
 def main():
     """Main function for enhanced RAG chatbot system"""
@@ -50,7 +53,7 @@ def main():
         
         # Test LLM connection
         print("🔗 Testing LLM connection...")
-        test_response = model.generate(prompt="Hello", params=None)
+        test_response = get_model().generate(prompt="Hello", params=None)
         if test_response and "results" in test_response:
             print("✅ LLM connection established")
         else:
@@ -127,7 +130,7 @@ Please provide a helpful, short response that:
 Response:'''
 
         # Generate response using IBM Granite
-        generated_response = model.generate(prompt=prompt, params=None)
+        generated_response = get_model().generate(prompt=prompt, params=None)
         
         # Extract the generated text
         if generated_response and "results" in generated_response:
@@ -309,7 +312,7 @@ Please provide a short comparison that:
 
 Comparison:'''
 
-        generated_response = model.generate(prompt=comparison_prompt, params=None)
+        generated_response = get_model().generate(prompt=comparison_prompt, params=None)
         
         if generated_response and "results" in generated_response:
             return generated_response["results"][0]["generated_text"].strip()
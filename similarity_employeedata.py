@@ -6,14 +6,291 @@ structured code organization, and comprehensive search capabilities.
 """
 
 import chromadb
-from chromadb.utils import embedding_functions
-from typing import List, Dict, Any, Optional
+import faiss
+from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
+import hashlib
+import json
 import logging
+import os
+import sys
+import threading
+import numpy as np
+import polars as pl
+import torch
+from transformers import AutoTokenizer
+
+# ONNX Runtime is optional; without it the SentenceTransformer backend is used
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Directory where the ChromaDB collection is persisted between runs
+CHROMA_PERSIST_DIR = "./.chroma"
+
+# Rows per collection.add call; client-side batches of 50-250 rows give the best
+# insert throughput, while single huge calls can exceed Chroma's max batch size
+ADD_BATCH_SIZE = 200
+
+# On-disk cache for document embeddings, keyed by a hash of the document text
+EMBEDDING_CACHE_DIR = "./.emb_cache"
+
+# ONNX export of the encoder, created once with:
+#   optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 \
+#       --task feature-extraction ./minilm-onnx
+# A dynamically int8-quantized model_quantized.onnx in the same directory is preferred.
+# The export is opt-in: pass onnx_model_dir=ONNX_MODEL_DIR to EmployeeSearchSystem,
+# and only with the model_name the export was made from.
+ONNX_MODEL_DIR = "./minilm-onnx"
+
+# Number of recent query embeddings kept in memory
+QUERY_CACHE_SIZE = 1024
+
+# Employee fields stored as ChromaDB metadata
+METADATA_FIELDS = ("name", "department", "role", "experience", "location", "employment_type")
+
+# Embeddings are indexed in float32 without binary quantization: sign-bit codes
+# (48 bytes per MiniLM row) only pay off as a coarse pass at millions of rows,
+# and at this scale the exact inner-product scan is already sub-millisecond.
+# Above this many rows the exact flat index gives way to an IVF-PQ index
+FLAT_INDEX_MAX_ROWS = 100_000
+IVF_LISTS = 64
+PQ_MAX_SUBQUANTIZERS = 48
+IVF_NPROBE = 8
+
+
+# Comprehensive employee dataset
+EMPLOYEE_RECORDS = [
+    {
+        "id": "employee_1",
+        "name": "John Doe",
+        "experience": 5,
+        "department": "Engineering",
+        "role": "Software Engineer",
+        "skills": "Python, JavaScript, React, Node.js, databases",
+        "location": "New York",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_2",
+        "name": "Jane Smith",
+        "experience": 8,
+        "department": "Marketing",
+        "role": "Marketing Manager",
+        "skills": "Digital marketing, SEO, content strategy, analytics, social media",
+        "location": "Los Angeles",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_3",
+        "name": "Alice Johnson",
+        "experience": 3,
+        "department": "HR",
+        "role": "HR Coordinator",
+        "skills": "Recruitment, employee relations, HR policies, training programs",
+        "location": "Chicago",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_4",
+        "name": "Michael Brown",
+        "experience": 12,
+        "department": "Engineering",
+        "role": "Senior Software Engineer",
+        "skills": "Java, Spring Boot, microservices, cloud architecture, DevOps",
+        "location": "San Francisco",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_5",
+        "name": "Emily Wilson",
+        "experience": 2,
+        "department": "Marketing",
+        "role": "Marketing Assistant",
+        "skills": "Content creation, email marketing, market research, social media management",
+        "location": "Austin",
+        "employment_type": "Part-time"
+    },
+    {
+        "id": "employee_6",
+        "name": "David Lee",
+        "experience": 15,
+        "department": "Engineering",
+        "role": "Engineering Manager",
+        "skills": "Team leadership, project management, software architecture, mentoring",
+        "location": "Seattle",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_7",
+        "name": "Sarah Clark",
+        "experience": 8,
+        "department": "HR",
+        "role": "HR Manager",
+        "skills": "Performance management, compensation planning, policy development, conflict resolution",
+        "location": "Boston",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_8",
+        "name": "Chris Evans",
+        "experience": 20,
+        "department": "Engineering",
+        "role": "Senior Architect",
+        "skills": "System design, distributed systems, cloud platforms, technical strategy",
+        "location": "New York",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_9",
+        "name": "Jessica Taylor",
+        "experience": 4,
+        "department": "Marketing",
+        "role": "Marketing Specialist",
+        "skills": "Brand management, advertising campaigns, customer analytics, creative strategy",
+        "location": "Miami",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_10",
+        "name": "Alex Rodriguez",
+        "experience": 18,
+        "department": "Engineering",
+        "role": "Lead Software Engineer",
+        "skills": "Full-stack development, React, Python, machine learning, data science",
+        "location": "Denver",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_11",
+        "name": "Hannah White",
+        "experience": 6,
+        "department": "HR",
+        "role": "HR Business Partner",
+        "skills": "Strategic HR, organizational development, change management, employee engagement",
+        "location": "Portland",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_12",
+        "name": "Kevin Martinez",
+        "experience": 10,
+        "department": "Engineering",
+        "role": "DevOps Engineer",
+        "skills": "Docker, Kubernetes, AWS, CI/CD pipelines, infrastructure automation",
+        "location": "Phoenix",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_13",
+        "name": "Rachel Brown",
+        "experience": 7,
+        "department": "Marketing",
+        "role": "Marketing Director",
+        "skills": "Strategic marketing, team leadership, budget management, campaign optimization",
+        "location": "Atlanta",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_14",
+        "name": "Matthew Garcia",
+        "experience": 3,
+        "department": "Engineering",
+        "role": "Junior Software Engineer",
+        "skills": "JavaScript, HTML/CSS, basic backend development, learning frameworks",
+        "location": "Dallas",
+        "employment_type": "Full-time"
+    },
+    {
+        "id": "employee_15",
+        "name": "Olivia Moore",
+        "experience": 12,
+        "department": "Engineering",
+        "role": "Principal Engineer",
+        "skills": "Technical leadership, system architecture, performance optimization, mentoring",
+        "location": "San Francisco",
+        "employment_type": "Full-time"
+    },
+]
+
+
+@lru_cache(maxsize=1)
+def _employee_data_cached() -> Tuple[Mapping[str, Any], ...]:
+    """Build the immutable employee dataset once per process."""
+    return tuple(MappingProxyType(dict(employee)) for employee in EMPLOYEE_RECORDS)
+
+
+@lru_cache(maxsize=1)
+def _employee_documents_cached() -> Tuple[str, ...]:
+    """Build the search documents for the shared employee dataset once per process."""
+    frame = EmployeeSearchSystem._build_frame(_employee_data_cached())
+    return tuple(EmployeeSearchSystem._format_documents(frame))
+
+
+def available_cpu_count() -> int:
+    """Count the CPUs this process may run on, honouring affinity masks where supported."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder backed by an ONNX Runtime session.
+    
+    Mirrors the subset of SentenceTransformer.encode used by EmployeeSearchSystem:
+    tokenize, run the exported transformer, mean-pool over the attention mask and
+    optionally L2-normalize.
+    """
+    
+    def __init__(self, model_dir: str):
+        """Load the tokenizer and ONNX session from an exported model directory."""
+        self.model_path = os.path.join(model_dir, "model_quantized.onnx")
+        if not os.path.exists(self.model_path):
+            self.model_path = os.path.join(model_dir, "model.onnx")
+        available = onnxruntime.get_available_providers()
+        providers = [provider for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+                     if provider in available]
+        self.session = onnxruntime.InferenceSession(self.model_path, providers=providers)
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        self.device = self.session.get_providers()[0]
+    
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False) -> np.ndarray:
+        """
+        Encode sentences into mean-pooled embeddings, one row per sentence.
+        
+        Like SentenceTransformer.encode, sentences are sorted by length so each batch
+        pads to a similar length, and rows are returned in the original input order.
+        """
+        order = np.argsort([len(sentence.split()) for sentence in sentences], kind="stable")
+        sorted_sentences = [sentences[i] for i in order]
+        batches = []
+        for start in range(0, len(sorted_sentences), batch_size):
+            encoded = self.tokenizer(
+                sorted_sentences[start:start + batch_size], padding=True, truncation=True,
+                return_tensors="np"
+            )
+            inputs = {name: array for name, array in encoded.items() if name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+            mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled)
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches)[np.argsort(order)]
+
 
 class EmployeeSearchSystem:
     """
@@ -21,186 +298,231 @@ class EmployeeSearchSystem:
     and metadata filtering.
     """
     
-    def __init__(self, collection_name: str = "employee_collection"):
-        """Initialize the search system with ChromaDB client and embedding function."""
+    def __init__(self, collection_name: str = "employee_collection",
+                 model_name: str = "all-MiniLM-L6-v2",
+                 onnx_model_dir: Optional[str] = None,
+                 persist_directory: str = CHROMA_PERSIST_DIR):
+        """Initialize the search system with a persistent ChromaDB client and embedding model."""
         self.collection_name = collection_name
-        self.client = chromadb.Client()
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.model_name = model_name
+        self.model = self._load_model(model_name, onnx_model_dir)
+        # LRU of recent query embeddings, stored as float32 bytes so entries stay immutable
+        self._query_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         self.collection = None
         self.employees_data = self._get_employee_data()
+        self.df = self._build_frame(self.employees_data)
         
-    def _get_employee_data(self) -> List[Dict[str, Any]]:
-        """Define comprehensive employee dataset."""
-        return [
-            {
-                "id": "employee_1",
-                "name": "John Doe",
-                "experience": 5,
-                "department": "Engineering",
-                "role": "Software Engineer",
-                "skills": "Python, JavaScript, React, Node.js, databases",
-                "location": "New York",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_2",
-                "name": "Jane Smith",
-                "experience": 8,
-                "department": "Marketing",
-                "role": "Marketing Manager",
-                "skills": "Digital marketing, SEO, content strategy, analytics, social media",
-                "location": "Los Angeles",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_3",
-                "name": "Alice Johnson",
-                "experience": 3,
-                "department": "HR",
-                "role": "HR Coordinator",
-                "skills": "Recruitment, employee relations, HR policies, training programs",
-                "location": "Chicago",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_4",
-                "name": "Michael Brown",
-                "experience": 12,
-                "department": "Engineering",
-                "role": "Senior Software Engineer",
-                "skills": "Java, Spring Boot, microservices, cloud architecture, DevOps",
-                "location": "San Francisco",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_5",
-                "name": "Emily Wilson",
-                "experience": 2,
-                "department": "Marketing",
-                "role": "Marketing Assistant",
-                "skills": "Content creation, email marketing, market research, social media management",
-                "location": "Austin",
-                "employment_type": "Part-time"
-            },
-            {
-                "id": "employee_6",
-                "name": "David Lee",
-                "experience": 15,
-                "department": "Engineering",
-                "role": "Engineering Manager",
-                "skills": "Team leadership, project management, software architecture, mentoring",
-                "location": "Seattle",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_7",
-                "name": "Sarah Clark",
-                "experience": 8,
-                "department": "HR",
-                "role": "HR Manager",
-                "skills": "Performance management, compensation planning, policy development, conflict resolution",
-                "location": "Boston",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_8",
-                "name": "Chris Evans",
-                "experience": 20,
-                "department": "Engineering",
-                "role": "Senior Architect",
-                "skills": "System design, distributed systems, cloud platforms, technical strategy",
-                "location": "New York",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_9",
-                "name": "Jessica Taylor",
-                "experience": 4,
-                "department": "Marketing",
-                "role": "Marketing Specialist",
-                "skills": "Brand management, advertising campaigns, customer analytics, creative strategy",
-                "location": "Miami",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_10",
-                "name": "Alex Rodriguez",
-                "experience": 18,
-                "department": "Engineering",
-                "role": "Lead Software Engineer",
-                "skills": "Full-stack development, React, Python, machine learning, data science",
-                "location": "Denver",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_11",
-                "name": "Hannah White",
-                "experience": 6,
-                "department": "HR",
-                "role": "HR Business Partner",
-                "skills": "Strategic HR, organizational development, change management, employee engagement",
-                "location": "Portland",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_12",
-                "name": "Kevin Martinez",
-                "experience": 10,
-                "department": "Engineering",
-                "role": "DevOps Engineer",
-                "skills": "Docker, Kubernetes, AWS, CI/CD pipelines, infrastructure automation",
-                "location": "Phoenix",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_13",
-                "name": "Rachel Brown",
-                "experience": 7,
-                "department": "Marketing",
-                "role": "Marketing Director",
-                "skills": "Strategic marketing, team leadership, budget management, campaign optimization",
-                "location": "Atlanta",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_14",
-                "name": "Matthew Garcia",
-                "experience": 3,
-                "department": "Engineering",
-                "role": "Junior Software Engineer",
-                "skills": "JavaScript, HTML/CSS, basic backend development, learning frameworks",
-                "location": "Dallas",
-                "employment_type": "Full-time"
-            },
-            {
-                "id": "employee_15",
-                "name": "Olivia Moore",
-                "experience": 12,
-                "department": "Engineering",
-                "role": "Principal Engineer",
-                "skills": "Technical leadership, system architecture, performance optimization, mentoring",
-                "location": "San Francisco",
-                "employment_type": "Full-time"
-            },
-        ]
-    
-    def _create_employee_documents(self) -> List[str]:
+        # In-memory search state, populated by initialize_collection()
+        self.ids: List[str] = []
+        self.documents: Sequence[str] = ()
+        self.metadatas: List[Dict[str, Any]] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self.index: Optional[faiss.Index] = None
+        
+    @staticmethod
+    def _load_model(model_name: str, onnx_model_dir: Optional[str] = None):
+        """
+        Load the embedding model.
+        
+        An ONNX export of model_name in onnx_model_dir is used when the caller
+        passes one and it loads; otherwise the SentenceTransformer runs on GPU in
+        fp16 when available, else on CPU.
+        """
+        if onnxruntime is not None and onnx_model_dir and os.path.isdir(onnx_model_dir):
+            try:
+                model = OnnxSentenceEncoder(onnx_model_dir)
+                logger.info(f"Loaded ONNX embedding model from {onnx_model_dir} on {model.device}")
+                return model
+            except Exception as error:
+                logger.warning(f"Could not load ONNX model, using SentenceTransformer: {error}")
+        
+        if torch.cuda.is_available():
+            model = SentenceTransformer(model_name, device="cuda")
+            model.half()
+        else:
+            model = SentenceTransformer(model_name, device="cpu")
+        
+        # Make sure the Rust-backed fast tokenizer is in use; reload it from the
+        # model's own files only if the install fell back to the Python one
+        if not getattr(model.tokenizer, "is_fast", False):
+            tokenizer_path = getattr(model.tokenizer, "name_or_path", model_name)
+            try:
+                model.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, use_fast=True)
+            except Exception as error:
+                logger.warning(f"No fast tokenizer available for {tokenizer_path}, keeping the default: {error}")
+        logger.info(f"Loaded embedding model {model_name} on {model.device}")
+        return model
+    
+    def _get_employee_data(self) -> Tuple[Mapping[str, Any], ...]:
+        """Return the employee dataset, built once per process and shared read-only."""
+        return _employee_data_cached()
+    
+    @staticmethod
+    def _build_frame(employees: Sequence[Mapping[str, Any]]) -> pl.DataFrame:
+        """
+        Load the employee records into a columnar Polars DataFrame.
+        
+        Integer fields are stored as Int32 so range filters compare natively.
+        """
+        frame = pl.DataFrame([dict(employee) for employee in employees])
+        return frame.with_columns(pl.col(pl.Int64).cast(pl.Int32))
+    
+    @staticmethod
+    def _format_documents(frame: pl.DataFrame) -> List[str]:
+        """Render one search document per employee row of the frame."""
+        if frame.is_empty():
+            return []
+        return frame.select(pl.format(
+            "{} with {} years of experience in {}. Skills: {}. Located in {}. Employment type: {}.",
+            "role", "experience", "department", "skills", "location", "employment_type"
+        )).to_series().to_list()
+    
+    def _create_employee_documents(self) -> Sequence[str]:
         """Create comprehensive text documents for each employee for similarity search."""
-        documents = []
-        for employee in self.employees_data:
-            document = (
-                f"{employee['role']} with {employee['experience']} years of experience "
-                f"in {employee['department']}. Skills: {employee['skills']}. "
-                f"Located in {employee['location']}. Employment type: {employee['employment_type']}."
+        if self.employees_data is _employee_data_cached():
+            return _employee_documents_cached()
+        return self._format_documents(self.df)
+    
+    def _encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts into normalized float32 embeddings in batched forward passes."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return embeddings.astype(np.float32)
+    
+    @staticmethod
+    def _build_index(embeddings: np.ndarray) -> faiss.Index:
+        """
+        Build an inner-product Faiss index over normalized embeddings.
+        
+        Small collections use an exact flat index; larger ones use IVF-PQ, which
+        needs a training pass and is probed with IVF_NPROBE lists per query. The
+        PQ sub-quantizer count is the largest divisor of the embedding dimension
+        not exceeding PQ_MAX_SUBQUANTIZERS, so any model's dimension is accepted.
+        """
+        dimension = embeddings.shape[1]
+        if len(embeddings) <= FLAT_INDEX_MAX_ROWS:
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            subquantizers = max(m for m in range(1, PQ_MAX_SUBQUANTIZERS + 1) if dimension % m == 0)
+            index = faiss.index_factory(
+                dimension, f"IVF{IVF_LISTS},PQ{subquantizers}", faiss.METRIC_INNER_PRODUCT
             )
-            documents.append(document)
-        return documents
+            index.train(embeddings)
+            faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+        index.add(embeddings)
+        return index
+    
+    def _model_signature(self) -> List[str]:
+        """Identify the encoder behind the embeddings: model, backend, device and precision."""
+        signature = [self.model_name, type(self.model).__name__, str(self.model.device)]
+        if isinstance(self.model, SentenceTransformer):
+            signature.append(str(next(self.model.parameters()).dtype))
+        else:
+            # Distinguishes model.onnx from model_quantized.onnx and re-exports
+            stat = os.stat(self.model.model_path)
+            signature += [os.path.abspath(self.model.model_path), str(stat.st_size), str(stat.st_mtime_ns)]
+        return signature
+    
+    def _embed_documents(self, documents: Sequence[str]) -> np.ndarray:
+        """
+        Compute document embeddings, reusing a cached copy from disk when available.
+        
+        Args:
+            documents: Documents to embed
+            
+        Returns:
+            Embedding matrix with one row per document
+        """
+        digest = hashlib.sha256(
+            "\n".join([*self._model_signature(), *documents]).encode("utf-8")
+        ).hexdigest()
+        cache_path = os.path.join(EMBEDDING_CACHE_DIR, f"{digest}.npy")
+        
+        if os.path.exists(cache_path):
+            logger.info(f"Loaded cached embeddings from {cache_path}")
+            return np.load(cache_path)
+        
+        embeddings = self._encode(list(documents))
+        try:
+            os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+            np.save(cache_path, embeddings)
+        except OSError as error:
+            logger.warning(f"Could not write embedding cache: {error}")
+        return embeddings
+    
+    def _data_hash(self) -> str:
+        """Hash the employee dataset together with the embedding model that indexes it."""
+        payload = json.dumps(
+            [self._model_signature(),
+             [dict(employee) for employee in self.employees_data]],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _load_current_collection(self, data_hash: str):
+        """Return the persisted collection if it holds the current dataset, else None."""
+        try:
+            collection = self.client.get_collection(name=self.collection_name, embedding_function=None)
+        except Exception:
+            return None  # Collection doesn't exist yet
+        
+        metadata = collection.metadata or {}
+        if metadata.get("data_hash") != data_hash or collection.count() != len(self.employees_data):
+            logger.info(f"Persisted collection {self.collection_name} is stale, rebuilding")
+            return None
+        return collection
+    
+    def _load_stored_embeddings(self) -> Optional[np.ndarray]:
+        """Read the embeddings back from the collection in self.ids order, or None if incomplete."""
+        try:
+            stored = self.collection.get(ids=self.ids, include=["embeddings"])
+            if stored.get("embeddings") is None:
+                return None
+            by_id = dict(zip(stored["ids"], stored["embeddings"]))
+            if any(doc_id not in by_id for doc_id in self.ids):
+                return None
+            return np.array([by_id[doc_id] for doc_id in self.ids], dtype=np.float32)
+        except Exception as error:
+            logger.warning(f"Could not read stored embeddings: {error}")
+            return None
     
     def initialize_collection(self) -> bool:
-        """Initialize and populate the ChromaDB collection."""
+        """
+        Initialize and populate the ChromaDB collection.
+        
+        A persisted collection built from the same data is reused as-is; it is only
+        deleted and rebuilt when the dataset or embedding model has changed.
+        """
         try:
+            # Prepare data
+            self.ids = [employee["id"] for employee in self.employees_data]
+            self.documents = self._create_employee_documents()
+            self.metadatas = [
+                {field: employee[field] for field in METADATA_FIELDS}
+                for employee in self.employees_data
+            ]
+            
+            # A persisted collection already holds the vectors; only encode when it can't supply them
+            data_hash = self._data_hash()
+            self.collection = self._load_current_collection(data_hash)
+            embeddings = self._load_stored_embeddings() if self.collection is not None else None
+            self.embeddings = embeddings if embeddings is not None else self._embed_documents(self.documents)
+            self.index = self._build_index(self.embeddings)
+            
+            # Run one encode so the first real query doesn't pay tokenizer/model start-up
+            self._encode(["warmup"])
+            
+            if self.collection is not None:
+                logger.info(f"Reusing persisted collection: {self.collection.name}")
+                return True
+            
             # Delete existing collection if it exists
             try:
                 self.client.delete_collection(name=self.collection_name)
@@ -208,30 +530,19 @@ class EmployeeSearchSystem:
             except Exception:
                 pass  # Collection doesn't exist, which is fine
             
-            # Create new collection
+            # Create new collection; embeddings are supplied explicitly
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                embedding_function=self.embedding_function,
-                metadata={"description": "A collection for storing employee data"}
+                embedding_function=None,
+                metadata={
+                    "description": "A collection for storing employee data",
+                    "data_hash": data_hash
+                }
             )
             logger.info(f"Created collection: {self.collection.name}")
             
-            # Prepare data
-            employee_documents = self._create_employee_documents()
-            
             # Add data to collection
-            self.collection.add(
-                ids=[employee["id"] for employee in self.employees_data],
-                documents=employee_documents,
-                metadatas=[{
-                    "name": employee["name"],
-                    "department": employee["department"],
-                    "role": employee["role"],
-                    "experience": employee["experience"],
-                    "location": employee["location"],
-                    "employment_type": employee["employment_type"]
-                } for employee in self.employees_data]
-            )
+            self._add_in_batches(self.ids, self.documents, self.embeddings, self.metadatas)
             
             logger.info(f"Added {len(self.employees_data)} employees to collection")
             return True
@@ -240,6 +551,27 @@ class EmployeeSearchSystem:
             logger.error(f"Error initializing collection: {error}")
             return False
     
+    def _add_in_batches(self, ids: List[str], documents: Sequence[str], embeddings: np.ndarray,
+                        metadatas: List[Dict[str, Any]], batch_size: int = ADD_BATCH_SIZE):
+        """
+        Add rows to the collection in fixed-size chunks.
+        
+        Args:
+            ids: Row ids
+            documents: Row documents
+            embeddings: Embedding matrix aligned with ids
+            metadatas: Row metadata dicts
+            batch_size: Number of rows per collection.add call
+        """
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                ids=ids[start:end],
+                documents=list(documents[start:end]),
+                embeddings=embeddings[start:end].tolist(),
+                metadatas=metadatas[start:end]
+            )
+    
     def similarity_search(self, query: str, n_results: int = 5, 
                          filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
@@ -258,37 +590,197 @@ class EmployeeSearchSystem:
             return None
             
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=filters
-            )
-            return results
+            query_embedding = self.encode_queries([query])[0]
         except Exception as error:
             logger.error(f"Error in similarity search: {error}")
             return None
+        return self.similarity_search_with_embedding(query_embedding, n_results, filters)
     
-    def metadata_filter_search(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def encode_queries(self, queries: List[str], batch_size: int = 16) -> np.ndarray:
+        """
+        Encode several queries, serving repeats from the query LRU cache.
+        
+        Only queries missing from the cache are encoded, in one batched forward pass.
+        Cache reads and updates are guarded by a lock so concurrent searches are safe;
+        the encode itself runs outside the lock.
+        
+        Args:
+            queries: Search query texts
+            batch_size: Number of queries per forward pass
+            
+        Returns:
+            Embedding matrix with one row per query
+        """
+        if not queries:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        hits = {}
+        with self._query_cache_lock:
+            for query in dict.fromkeys(queries):
+                if query in self._query_cache:
+                    self._query_cache.move_to_end(query)
+                    hits[query] = np.frombuffer(self._query_cache[query], dtype=np.float32)
+        
+        misses = [query for query in dict.fromkeys(queries) if query not in hits]
+        fresh = dict(zip(misses, self._encode(misses, batch_size=batch_size))) if misses else {}
+        
+        if fresh:
+            with self._query_cache_lock:
+                for query, embedding in fresh.items():
+                    self._query_cache[query] = embedding.tobytes()
+                    self._query_cache.move_to_end(query)
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        
+        return np.vstack([hits[query] if query in hits else fresh[query] for query in queries])
+    
+    def similarity_search_with_embedding(self, query_embedding: np.ndarray, n_results: int = 5,
+                                         filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Perform similarity search for an already encoded query.
+        
+        Args:
+            query_embedding: Normalized query embedding (e.g. a row from encode_queries)
+            n_results: Number of results to return
+            filters: Optional metadata filters
+            
+        Returns:
+            Search results or None if error
+        """
+        if not self.collection:
+            logger.error("Collection not initialized. Call initialize_collection() first.")
+            return None
+            
+        try:
+            query_embedding = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+            
+            # Restrict the search to rows matching the metadata filters
+            params = None
+            if filters:
+                candidates = self._filter_frame(filters)["row"].to_numpy().astype(np.int64)
+                params = self._search_params(faiss.IDSelectorBatch(candidates))
+            
+            scores, indices = self.index.search(query_embedding, n_results, params=params)
+            found = indices[0] >= 0
+            # Report squared L2 distance (2 - 2*cos for unit vectors), matching Chroma's default space
+            return self._format_query_results(indices[0][found], 2.0 - 2.0 * scores[0][found])
+        except Exception as error:
+            logger.error(f"Error in similarity search: {error}")
+            return None
+    
+    def _search_params(self, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        """Build search parameters restricting the index search to the selected rows."""
+        if faiss.try_extract_index_ivf(self.index) is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=IVF_NPROBE)
+        return faiss.SearchParameters(sel=selector)
+    
+    def _format_query_results(self, indices: np.ndarray, distances: np.ndarray) -> Dict[str, Any]:
+        """Package row indices and distances in ChromaDB's query result layout."""
+        return {
+            "ids": [[self.ids[i] for i in indices]],
+            "distances": [distances.tolist()],
+            "metadatas": [[self.metadatas[i] for i in indices]],
+            "documents": [[self.documents[i] for i in indices]]
+        }
+    
+    def metadata_filter_search(self, filters: Dict[str, Any],
+                               columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Perform metadata-only filtering without similarity search.
         
         Args:
             filters: Metadata filters to apply
+            columns: Metadata fields to return (defaults to all metadata fields)
             
         Returns:
-            Filtered results or None if error
+            Filtered results (ids and metadatas only) or None if error
         """
         if not self.collection:
             logger.error("Collection not initialized. Call initialize_collection() first.")
             return None
             
         try:
-            results = self.collection.get(where=filters)
-            return results
+            fields = list(columns) if columns else list(METADATA_FIELDS)
+            matches = self._filter_frame(filters)
+            return {
+                "ids": matches["id"].to_list(),
+                "metadatas": matches.select(fields).to_dicts()
+            }
         except Exception as error:
             logger.error(f"Error in metadata filtering: {error}")
             return None
     
+    def _filter_frame(self, filters: Dict[str, Any]) -> pl.DataFrame:
+        """
+        Select the employee rows matching metadata filters.
+        
+        Filters are compiled to a Polars expression and evaluated over the
+        columnar frame; anything the compiler does not understand is delegated
+        to ChromaDB. The returned frame carries each row's position in a "row" column.
+        """
+        frame = self.df.with_row_index("row")
+        try:
+            return frame.filter(self._filter_expr(filters))
+        except (ValueError, TypeError, pl.exceptions.PolarsError) as error:
+            logger.debug(f"Delegating filter to ChromaDB: {error}")
+            allowed = self.collection.get(where=filters, include=[])['ids']
+            return frame.filter(pl.col("id").is_in(allowed))
+    
+    def _filter_expr(self, filters: Dict[str, Any]) -> pl.Expr:
+        """
+        Compile a ChromaDB-style where clause into a Polars boolean expression.
+        
+        Supports $and/$or combinators, bare equality, and the $eq, $ne, $gt,
+        $gte, $lt, $lte, $in and $nin operators on the fields stored as
+        ChromaDB metadata.
+        
+        Raises:
+            ValueError: If the clause uses a non-metadata field or unknown operator
+        """
+        expr = pl.lit(True)
+        for key, condition in filters.items():
+            if key == "$and":
+                for clause in condition:
+                    expr = expr & self._filter_expr(clause)
+            elif key == "$or":
+                matched = pl.lit(False)
+                for clause in condition:
+                    matched = matched | self._filter_expr(clause)
+                expr = expr & matched
+            elif key in METADATA_FIELDS:
+                expr = expr & self._condition_expr(pl.col(key), condition)
+            else:
+                raise ValueError(f"Unsupported filter key: {key}")
+        return expr
+    
+    @staticmethod
+    def _condition_expr(column: pl.Expr, condition: Any) -> pl.Expr:
+        """Compile a single field condition against a column expression."""
+        if not isinstance(condition, dict):
+            return column == condition
+        
+        expr = pl.lit(True)
+        for operator, value in condition.items():
+            if operator == "$eq":
+                expr = expr & (column == value)
+            elif operator == "$ne":
+                expr = expr & (column != value)
+            elif operator == "$gt":
+                expr = expr & (column > value)
+            elif operator == "$gte":
+                expr = expr & (column >= value)
+            elif operator == "$lt":
+                expr = expr & (column < value)
+            elif operator == "$lte":
+                expr = expr & (column <= value)
+            elif operator == "$in":
+                expr = expr & column.is_in(list(value))
+            elif operator == "$nin":
+                expr = expr & ~column.is_in(list(value))
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+        return expr
+    
     def get_collection_stats(self) -> Optional[Dict[str, Any]]:
         """Get statistics about the collection."""
         if not self.collection:
@@ -308,7 +800,7 @@ class EmployeeSearchSystem:
     def print_search_results(self, results: Dict[str, Any], query: str = "", 
                            show_documents: bool = True, max_doc_length: int = 100):
         """
-        Pretty print search results.
+        Pretty print search results, dispatching on the result layout.
         
         Args:
             results: Search results from ChromaDB
@@ -319,33 +811,89 @@ class EmployeeSearchSystem:
         if not results or not results.get('ids'):
             print("No results found.")
             return
-            
-        if query:
-            print(f"Query: '{query}'")
-            
-        # Handle both query results (with distances) and get results (without distances)
-        has_distances = 'distances' in results and results['distances']
-        ids_list = results['ids'][0] if isinstance(results['ids'][0], list) else results['ids']
-        
-        print(f"Found {len(ids_list)} results:")
-        
-        for i, doc_id in enumerate(ids_list):
-            if has_distances:
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-                document = results['documents'][0][i] if show_documents else ""
-                print(f"\n  {i+1}. {metadata['name']} ({doc_id}) - Distance: {distance:.4f}")
-            else:
-                metadata = results['metadatas'][i]
-                document = results['documents'][i] if show_documents and 'documents' in results else ""
-                print(f"\n  {i+1}. {metadata['name']} ({doc_id})")
-            
-            print(f"     Role: {metadata['role']}, Department: {metadata['department']}")
-            print(f"     Experience: {metadata['experience']} years, Location: {metadata['location']}")
-            
-            if show_documents and document:
-                doc_snippet = document[:max_doc_length] + "..." if len(document) > max_doc_length else document
-                print(f"     Document: {doc_snippet}")
+        
+        # Query results nest one list per query; get results are flat
+        if isinstance(results['ids'][0], list):
+            self.print_query_results(results, query, show_documents, max_doc_length)
+        else:
+            self.print_get_results(results, query, show_documents, max_doc_length)
+    
+    def print_query_results(self, results: Dict[str, Any], query: str = "",
+                            show_documents: bool = True, max_doc_length: int = 100):
+        """
+        Pretty print similarity search results (single query, with distances).
+        
+        Args:
+            results: Query results from similarity_search
+            query: Original query (for display purposes)
+            show_documents: Whether to show document content
+            max_doc_length: Maximum length of document snippets to show
+        """
+        if not results or not results.get('ids'):
+            print("No results found.")
+            return
+        
+        ids_list = results['ids'][0]
+        metadatas = results['metadatas'][0]
+        distances = results['distances'][0]
+        documents = results['documents'][0] if show_documents and results.get('documents') else None
+        
+        # Assemble the whole listing in one buffer and write it out once
+        lines = [f"Query: '{query}'"] if query else []
+        lines.append(f"Found {len(ids_list)} results:")
+        
+        for i, (doc_id, metadata, distance) in enumerate(zip(ids_list, metadatas, distances)):
+            lines.append(f"\n  {i+1}. {metadata['name']} ({doc_id}) - Distance: {distance:.4f}")
+            lines.append(f"     Role: {metadata['role']}, Department: {metadata['department']}")
+            lines.append(f"     Experience: {metadata['experience']} years, Location: {metadata['location']}")
+            if documents:
+                self._append_document_line(lines, documents[i], max_doc_length)
+        
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
+    
+    def print_get_results(self, results: Dict[str, Any], query: str = "",
+                          show_documents: bool = True, max_doc_length: int = 100):
+        """
+        Pretty print metadata filtering results (flat layout, no distances).
+        
+        Args:
+            results: Get results from metadata_filter_search
+            query: Original query (for display purposes)
+            show_documents: Whether to show document content
+            max_doc_length: Maximum length of document snippets to show
+        """
+        if not results or not results.get('ids'):
+            print("No results found.")
+            return
+        
+        ids_list = results['ids']
+        metadatas = results['metadatas']
+        documents = results['documents'] if show_documents and results.get('documents') else None
+        
+        # Assemble the whole listing in one buffer and write it out once
+        lines = [f"Query: '{query}'"] if query else []
+        lines.append(f"Found {len(ids_list)} results:")
+        
+        for i, (doc_id, metadata) in enumerate(zip(ids_list, metadatas)):
+            lines.append(f"\n  {i+1}. {metadata['name']} ({doc_id})")
+            lines.append(f"     Role: {metadata['role']}, Department: {metadata['department']}")
+            lines.append(f"     Experience: {metadata['experience']} years, Location: {metadata['location']}")
+            if documents:
+                self._append_document_line(lines, documents[i], max_doc_length)
+        
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
+    
+    @staticmethod
+    def _append_document_line(lines: List[str], document: str, max_doc_length: int):
+        """Append a document snippet line, formatting the slice and ellipsis in one f-string."""
+        if not document:
+            return
+        if len(document) > max_doc_length:
+            lines.append(f"     Document: {document[:max_doc_length]}...")
+        else:
+            lines.append(f"     Document: {document}")
 
 
 def run_comprehensive_demo():
@@ -368,9 +916,6 @@ def run_comprehensive_demo():
     print("COMPREHENSIVE EMPLOYEE SEARCH DEMONSTRATION")
     print("="*60)
     
-    # Demo 1: Similarity Search Examples
-    print("\n=== SIMILARITY SEARCH EXAMPLES ===")
-    
     search_queries = [
         ("Python developer with web development experience", 3),
         ("team leader manager with experience", 3),
@@ -378,12 +923,43 @@ def run_comprehensive_demo():
         ("marketing strategy and analytics", 2)
     ]
     
-    for i, (query, n_results) in enumerate(search_queries, 1):
+    combined_searches = [
+        (
+            "senior Python developer full-stack",
+            {"$and": [
+                {"experience": {"$gte": 8}},
+                {"location": {"$in": ["San Francisco", "New York", "Seattle"]}}
+            ]},
+            "Senior Python developers in major tech cities"
+        ),
+        (
+            "leadership management experience",
+            {"department": "Engineering"},
+            "Engineering leaders and managers"
+        )
+    ]
+    
+    # Encode every demo query in one batch, then search the index with each vector
+    searches = (
+        [(query, n_results, None) for query, n_results in search_queries]
+        + [(query, 5, filters) for query, filters, _ in combined_searches]
+    )
+    query_embeddings = search_system.encode_queries([query for query, _, _ in searches])
+    search_results = [
+        search_system.similarity_search_with_embedding(embedding, n_results, filters)
+        for embedding, (_, n_results, filters) in zip(query_embeddings, searches)
+    ]
+    similarity_results = search_results[:len(search_queries)]
+    combined_results = search_results[len(search_queries):]
+    
+    # Demo 1: Similarity Search Examples
+    print("\n=== SIMILARITY SEARCH EXAMPLES ===")
+    
+    for i, ((query, n_results), results) in enumerate(zip(search_queries, similarity_results), 1):
         print(f"\n{i}. Searching for: {query}")
         print("-" * 50)
-        results = search_system.similarity_search(query, n_results)
         if results:
-            search_system.print_search_results(results, query)
+            search_system.print_query_results(results, query)
     
     # Demo 2: Metadata Filtering Examples
     print("\n\n=== METADATA FILTERING EXAMPLES ===")
@@ -398,36 +974,21 @@ def run_comprehensive_demo():
     for i, (filters, description) in enumerate(filter_examples, 1):
         print(f"\n{i}. {description}:")
         print("-" * 50)
-        results = search_system.metadata_filter_search(filters)
+        results = search_system.metadata_filter_search(
+            filters, columns=["name", "role", "department", "experience", "location"]
+        )
         if results:
-            search_system.print_search_results(results, show_documents=False)
+            search_system.print_get_results(results, show_documents=False)
     
     # Demo 3: Combined Search (Similarity + Metadata Filtering)
     print("\n\n=== COMBINED SEARCH EXAMPLES ===")
     
-    combined_searches = [
-        (
-            "senior Python developer full-stack",
-            {"$and": [
-                {"experience": {"$gte": 8}},
-                {"location": {"$in": ["San Francisco", "New York", "Seattle"]}}
-            ]},
-            "Senior Python developers in major tech cities"
-        ),
-        (
-            "leadership management experience",
-            {"department": "Engineering"},
-            "Engineering leaders and managers"
-        )
-    ]
-    
-    for i, (query, filters, description) in enumerate(combined_searches, 1):
+    for i, ((query, filters, description), results) in enumerate(zip(combined_searches, combined_results), 1):
         print(f"\n{i}. {description}:")
         print(f"   Query: '{query}' with metadata filters")
         print("-" * 50)
-        results = search_system.similarity_search(query, n_results=5, filters=filters)
         if results:
-            search_system.print_search_results(results, query)
+            search_system.print_query_results(results, query)
     
     print("\n" + "="*60)
     print("DEMONSTRATION COMPLETED")
@@ -437,6 +998,9 @@ def run_comprehensive_demo():
 def main():
     """Main function to run the employee search system demonstration."""
     try:
+        # Let CPU inference use every core this process may run on
+        if not torch.cuda.is_available():
+            torch.set_num_threads(available_cpu_count())
         run_comprehensive_demo()
     except Exception as error:
         logger.error(f"Error in main execution: {error}")